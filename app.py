@@ -1,11 +1,11 @@
-from utils.logutil import setup_logger
-setup_logger()
-
+# Spawned helper processes (RERANK_WORKER=process) re-import this module as __mp_main__, so only
+# cheap imports live at module level; Bedrock clients, models and the checkpoint DB are set up in main()
+import argparse
+import os
+import sqlite3
+import uuid
 
-from langgraph.graph import StateGraph, END
-
-from components.agents import planner_agent,researcher_executor,prepare_answer
-from utils.common import AgentState
+from utils.logutil import setup_logger
 # ---------------- ROUTER ----------------
 
 
@@ -51,53 +51,103 @@ def route(state):
     else:
         raise ValueError(f"Unknown task: {state['next_task']}")
 # ---------------- GRAPH ----------------
+CHECKPOINT_DB = os.getenv("CHECKPOINT_DB", "tmp/checkpoints.sqlite")
 
-graph = StateGraph(AgentState)
 
-graph.add_node("plan", planner_agent)
-graph.add_node("research", researcher_executor)
-graph.add_node("answer", prepare_answer)
-# graph.add_node("math", math_executor)
-# graph.add_node("toolnode", ToolNode(TOOLS))
-# graph.add_node("router", route_dummy)
-graph.set_entry_point("plan")
-graph.add_conditional_edges("plan", route, {
-    "research": "research",
-    "answer": "answer",
-    "plan": "plan"
-})
-graph.add_edge("research", "plan")
-graph.add_edge("answer", END)
+def build_app():
+    from langgraph.graph import StateGraph, END
+    from langgraph.checkpoint.sqlite import SqliteSaver
 
-# def is_done(state):
-#     """Check if all tasks are completed."""
-#     return state["current_step"] >= len(state["tasks"])
+    from components.agents import planner_agent,researcher_executor,prepare_answer
+    from utils.common import AgentState
 
-# graph.add_conditional_edges("researcher", is_done, {True: END, False: "router"})
-# graph.add_conditional_edges("cot", is_done, {True: END, False: "router"})
-# graph.add_conditional_edges("math", is_done, {True: END, False: "router"})
+    graph = StateGraph(AgentState)
 
-app = graph.compile()
-# print(app.get_graph().draw_ascii())
+    graph.add_node("plan", planner_agent)
+    graph.add_node("research", researcher_executor)
+    graph.add_node("answer", prepare_answer)
+    # graph.add_node("math", math_executor)
+    # graph.add_node("toolnode", ToolNode(TOOLS))
+    # graph.add_node("router", route_dummy)
+    graph.set_entry_point("plan")
+    graph.add_conditional_edges("plan", route, {
+        "research": "research",
+        "answer": "answer",
+        "plan": "plan"
+    })
+    graph.add_edge("research", "plan")
+    graph.add_edge("answer", END)
 
+    # def is_done(state):
+    #     """Check if all tasks are completed."""
+    #     return state["current_step"] >= len(state["tasks"])
+
+    # graph.add_conditional_edges("researcher", is_done, {True: END, False: "router"})
+    # graph.add_conditional_edges("cot", is_done, {True: END, False: "router"})
+    # graph.add_conditional_edges("math", is_done, {True: END, False: "router"})
+
+    os.makedirs(os.path.dirname(CHECKPOINT_DB) or ".", exist_ok=True)
+    # Every completed node is checkpointed per run ID, so a failed run can resume from its last completed step
+    checkpointer = SqliteSaver(sqlite3.connect(CHECKPOINT_DB, check_same_thread=False))
+
+    app = graph.compile(checkpointer=checkpointer)
+    # print(app.get_graph().draw_ascii())
+    return app
 
-with open("graph.png", "wb") as f:
-    print(f'writing file {f.name}')
-    f.write(app.get_graph().draw_mermaid_png())
 
 # ---------------- RUN ----------------
-# query = "Find Tesla's last quarter performance, get capital of France, and calculate revenue change from 10B to 12B."
-query = "Find Google's 2024 year performance, how is company doing and what are there immediate plan to get more market share."
-# query = "What is apple inc up to? What are new features of the new products its going to launch?"
-result = app.invoke({"query": query})
+def main():
+    setup_logger()
+    app = build_app()
+
+    from components.prefetch import prefetcher
+    from utils.models import usage_report
+
+    with open("graph.png", "wb") as f:
+        print(f'writing file {f.name}')
+        f.write(app.get_graph().draw_mermaid_png())
+
+    # query = "Find Tesla's last quarter performance, get capital of France, and calculate revenue change from 10B to 12B."
+    query = "Find Google's 2024 year performance, how is company doing and what are there immediate plan to get more market share."
+    # query = "What is apple inc up to? What are new features of the new products its going to launch?"
+
+    parser = argparse.ArgumentParser(description="Multi-agent research over the internet")
+    parser.add_argument("--query", default=query, help="Question to research")
+    parser.add_argument("--run-id", help="Resume the run with this ID from its last completed step")
+    args = parser.parse_args()
+
+    run_id = args.run_id or uuid.uuid4().hex
+    config = {"configurable": {"thread_id": run_id}}
+    snapshot = app.get_state(config)
+
+    try:
+        if args.run_id and snapshot.values and not snapshot.next:
+            print(f"✅ Run {run_id} already finished, loading its result")
+            result = snapshot.values
+        elif args.run_id and snapshot.values:
+            print(f"🔁 Resuming run {run_id} at step {snapshot.values.get('current_step', 0)} ({', '.join(snapshot.next)})")
+            result = app.invoke(None, config)
+        else:
+            print(f"🚀 Starting run {run_id}")
+            result = app.invoke({"query": args.query}, config)
+    except Exception:
+        print(f"❌ Run {run_id} failed. Resume it with: python app.py --run-id {run_id}")
+        raise
+
+
+    print(result["scratchpad"])
 
+    print("\n\n\n\n--------------------------Multi-Agent Routed Execution:")
 
-print(result["scratchpad"])
+    print(result["result"])
+    # for r in result["results"]:
+        # print(" -", r)
+    print("--------------------------")
 
-print("\n\n\n\n--------------------------Multi-Agent Routed Execution:")
+    if prefetcher.enabled:
+        print(prefetcher.report())
+    print(usage_report())
 
-print(result["result"])
-# for r in result["results"]:
-    # print(" -", r)
-print("--------------------------")
 
+if __name__ == "__main__":
+    main()
@@ -4,8 +4,18 @@ import json
 import re
 # from langgraph.visualization import visualize
 
-from utils.common import llm, rerank_segments, chunk_documents
-from components.tools import TOOL_MAP ,get_tool_manifest_json, search_and_scrape_web, search_and_scrape_news
+from utils.common import score_segments, chunk_documents
+from utils.models import invoke_for_node
+from components.tools import TOOL_MAP ,get_tool_manifest_json, search_urls, scrape_urls, frontier
+from components.prefetch import TASK_SEARCH_TYPES, prefetcher, predict_research_inputs
+
+# One search at the largest breadth; results are downloaded and scored in slices of 5/10/20,
+# widening only while the best reranked chunks stay below the threshold
+SEARCH_BREADTHS = (5, 10, 20)
+RERANK_SCORE_THRESHOLD = 0.5
+RERANK_TOP_K = 3
+
+ACTION_PATTERN = re.compile(r"Action:\s*(\w+)\s*Action Input:\s*\"?(.+?)\"?\s*(?:\n|$)", re.DOTALL)
 
 
 high_level_tools = """
@@ -59,14 +69,25 @@ Current scratchpad:
 {scratchpad}
 """
 
-    response = llm.invoke(prompt).content.strip()
+    if not state.get("current_step"):
+        frontier.reset()
+    # Before prefetching, so the researcher can tell this step's pages from earlier steps'
+    frontier.start_step()
+
+    # Overlap search/download for the likely next input with the planner LLM call
+    if prefetcher.enabled:
+        for predicted_input in predict_research_inputs(state):
+            prefetcher.prefetch("internet_researcher", predicted_input, SEARCH_BREADTHS[-1], scrape_first=SEARCH_BREADTHS[0])
+
+    response = invoke_for_node("planner", prompt, validate=lambda text: ACTION_PATTERN.search(text) is not None).strip()
     scratchpad += "\n" + response + "\n"
     print("✅ Planner reasoning:\n", response)
     # Match Action and Action Input
-    match = re.search(r"Action:\s*(\w+)\s*Action Input:\s*\"?(.+?)\"?(?:\s|$)", response, re.DOTALL)
+    match = ACTION_PATTERN.search(response)
     if match:
         executor_name = match.group(1).strip()
         executor_input = match.group(2).strip()
+        prefetcher.cancel_except(executor_name, executor_input)
         # print(f"✅ Planner selected: {executor_name} with input: {executor_input}")
         return {
             **state,
@@ -76,6 +97,7 @@ Current scratchpad:
             "current_step": state.get("current_step", 0) + 1
         }
     else:
+        prefetcher.cancel_except()
         raise ValueError("❌ No valid 'Action' and 'Action Input' found in planner output.")
 
 
@@ -83,22 +105,37 @@ def researcher_executor(state):
     """Executor for 'internet_researcher' or 'news_researcher' tools."""
     task_input: str = state.get("task_input", "")
     task = state.get("next_task", "")
-    tool = None
-    if task == 'internet_researcher':
-        tool = search_and_scrape_web
-    elif task == 'news_researcher':
-        tool = search_and_scrape_news
-    else:
+    if task not in TASK_SEARCH_TYPES:
         raise ValueError(f"Unknown researcher tool requested: {task}")
 
-    if tool is None:
-        raise ValueError(f"Tool not found for task: {task}")
-    
-    tool_args = {"input": task_input, "max_results": 20}
-    tool_output = tool.invoke(tool_args)
-    chunked_docs = chunk_documents([doc['content'] for doc in tool_output], chunk_size=500, overlap=50)
-    reranked_docs = rerank_segments(chunked_docs, query=task_input)
-    tool_output_reranked = "\n".join(reranked_docs)
+    urls = prefetcher.take(task, task_input, SEARCH_BREADTHS[-1]) if prefetcher.enabled else None
+    if urls is None:
+        urls = search_urls(task_input, max_results=SEARCH_BREADTHS[-1], type=TASK_SEARCH_TYPES[task])
+
+    tool_output = []
+    scored_chunks = []
+    reused = prefetched = 0
+    for start, end in zip((0,) + SEARCH_BREADTHS, SEARCH_BREADTHS):
+        batch = urls[start:end]
+        if not batch:
+            break
+        # Pages parsed by earlier steps or this step's prefetch are served without downloading
+        reused += sum(frontier.parsed_before_step(url) for url in batch)
+        prefetched += sum(url in frontier and not frontier.parsed_before_step(url) for url in batch)
+        new_docs = [doc for doc in scrape_urls(batch) if doc.get("content")]
+        tool_output.extend(new_docs)
+        # Only chunks from newly added pages need scoring
+        chunked_docs = chunk_documents([doc['content'] for doc in new_docs], chunk_size=500, overlap=50)
+        scored_chunks = sorted(scored_chunks + score_segments(chunked_docs, query=task_input), key=lambda x: x[1], reverse=True)
+        top_scores = [score for _, score in scored_chunks[:RERANK_TOP_K]]
+        top_score = sum(top_scores) / len(top_scores) if top_scores else 0.0
+        if top_score >= RERANK_SCORE_THRESHOLD:
+            break
+        if end < len(urls):
+            print(f"🔎 Top rerank score {top_score:.2f} below {RERANK_SCORE_THRESHOLD}, reading results {end + 1}-{min(len(urls), SEARCH_BREADTHS[-1])}")
+    print(f"🌐 {len(tool_output)} pages used this step, {reused} of {min(len(urls), end)} results already parsed by earlier steps"
+          + (f", {prefetched} by this step's prefetch" if prefetcher.enabled else ""))
+    tool_output_reranked = "\n".join(doc for doc, _ in scored_chunks)
     # print(f"🧪 {task} tool output:\n", tool_output)
     research_prompt = f"""
 You are a summarizer. Here is the raw content from the search results:
@@ -106,13 +143,21 @@ You are a summarizer. Here is the raw content from the search results:
 
 Provide a clear and concise summary of your findings in less than 1500 tokens. The topic is:- {task_input}.
 """
-    summary = llm.invoke(research_prompt).content
+    summary = invoke_for_node("summarizer", research_prompt)
     print(f"🧪 {task} tool summary:\n", summary)
     return {
         **state,
         "next_task": "plan",  # Go back to planner after research
         "task_input": "",
         "scratchpad": state["scratchpad"] + f"{summary}\n",
+        "last_summary": summary,
+        "artifacts": state.get("artifacts", []) + [{
+            "step": state["current_step"],
+            "task": task,
+            "input": task_input,
+            "urls": [doc["url"] for doc in tool_output],
+            "summary": summary,
+        }],
         "current_step": state["current_step"] + 1,
     }
 
@@ -133,7 +178,7 @@ Scratchpad:
 
 Final Answer:
 """
-    final_response = llm.invoke(final_prompt).content
+    final_response = invoke_for_node("answer", final_prompt)
     return {
         **state,
         "result": final_response,
@@ -0,0 +1,136 @@
+# Speculative prefetch: run search + scrape for likely planner inputs while the planner LLM is thinking
+
+import asyncio
+import os
+import re
+import threading
+from concurrent.futures import CancelledError, Future
+
+from components.tools import _scrape_urls, _search_urls
+
+
+TASK_SEARCH_TYPES = {"internet_researcher": "text", "news_researcher": "news"}
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "how", "in", "is", "it", "its",
+    "of", "on", "or", "that", "the", "their", "there", "this", "to", "was", "what", "which", "with",
+}
+
+
+def speculative_prefetch_enabled() -> bool:
+    return os.getenv("SPECULATIVE_PREFETCH", "0").strip().lower() in ("1", "true", "yes", "on")
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.strip().strip('"').lower().split())
+
+
+def _keywords(text: str) -> set[str]:
+    return {w for w in re.findall(r"[a-z0-9]+", text.lower()) if w not in STOPWORDS and len(w) > 2}
+
+
+async def _search_and_scrape_first(task_input: str, max_results: int, type: str, scrape_first: int) -> list[str]:
+    """Search at full breadth and parse the first results into the URL frontier; returns the URLs."""
+    urls = await _search_urls(task_input, max_results=max_results, type=type)
+    await _scrape_urls(urls[:scrape_first])
+    return urls
+
+
+def predict_research_inputs(state, limit: int = 1, max_words: int = 12) -> list[str]:
+    """Guess what the planner is about to search for.
+
+    Step one is almost always the raw user query. After that, pick the sentences of the
+    previous summary that overlap most with the query and use them as sub-queries.
+    """
+    query = state["query"]
+    last_summary = state.get("last_summary", "")
+    if not state.get("current_step") or not last_summary:
+        return [query]
+
+    query_words = _keywords(query)
+    sentences = [s.strip() for s in re.split(r"(?<=[.!?])\s+|\n+", last_summary) if s.strip()]
+    scored = sorted(
+        ((len(query_words & _keywords(s)), i, s) for i, s in enumerate(sentences)),
+        key=lambda x: (-x[0], x[1]),
+    )
+    predictions = []
+    for score, _, sentence in scored:
+        if score == 0 or len(predictions) >= limit:
+            break
+        candidate = " ".join(re.sub(r"^[-*\d.\s]+", "", sentence).split()[:max_words]).rstrip(".,;:")
+        if candidate and candidate not in predictions:
+            predictions.append(candidate)
+    return predictions or [query]
+
+
+class Prefetcher:
+    """Background search + scrape keyed by (task, input, max_results).
+
+    A prefetch yields the search result URLs, but only for the exact (normalized) input the
+    planner chose: results for a similar query are a different search. The pages a
+    mispredicted prefetch already parsed still land in the URL frontier, where the
+    researcher picks them up without downloading again.
+
+    Work runs on a dedicated event loop thread so in-flight downloads can be cancelled
+    when the planner picks something else.
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._lock = threading.Lock()
+        self._pending: dict[tuple[str, str, int], Future] = {}
+        self.stats = {"scheduled": 0, "hits": 0, "misses": 0, "cancelled": 0, "wasted": 0}
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        if self._loop is None:
+            self._loop = asyncio.new_event_loop()
+            threading.Thread(target=self._loop.run_forever, name="prefetch-loop", daemon=True).start()
+        return self._loop
+
+    def prefetch(self, task: str, task_input: str, max_results: int, scrape_first: int | None = None) -> None:
+        if not self.enabled or task not in TASK_SEARCH_TYPES or not task_input.strip():
+            return
+        key = (task, _normalize(task_input), max_results)
+        with self._lock:
+            if key in self._pending:
+                return
+            coro = _search_and_scrape_first(
+                task_input, max_results, TASK_SEARCH_TYPES[task], max_results if scrape_first is None else scrape_first
+            )
+            self._pending[key] = asyncio.run_coroutine_threadsafe(coro, self._ensure_loop())
+            self.stats["scheduled"] += 1
+        print(f"🔮 Prefetching {task}: {task_input}")
+
+    def take(self, task: str, task_input: str, max_results: int) -> list[str] | None:
+        """Return the prefetched search URLs for this input, waiting if it is still in flight. None on a miss."""
+        with self._lock:
+            future = self._pending.pop((task, _normalize(task_input), max_results), None)
+        result = None
+        if future is not None:
+            try:
+                result = future.result()
+            except (CancelledError, Exception) as e:
+                print(f"⚠️ Prefetch for '{task_input}' failed: {e}")
+        with self._lock:
+            self.stats["hits" if result is not None else "misses"] += 1
+        return result
+
+    def cancel_except(self, task: str | None = None, task_input: str | None = None) -> None:
+        """Drop every prefetch except the ones matching the planner's actual choice."""
+        keep = (task, _normalize(task_input)) if task_input is not None else None
+        with self._lock:
+            for key in [k for k in self._pending if k[:2] != keep]:
+                future = self._pending.pop(key)
+                self.stats["cancelled" if future.cancel() else "wasted"] += 1
+
+    def report(self) -> str:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        hit_rate = self.stats["hits"] / lookups if lookups else 0.0
+        return (
+            f"Prefetch: {self.stats['scheduled']} scheduled, {self.stats['hits']}/{lookups} hits "
+            f"({hit_rate:.0%}), {self.stats['cancelled']} cancelled, {self.stats['wasted']} completed unused"
+        )
+
+
+prefetcher = Prefetcher(enabled=speculative_prefetch_enabled())
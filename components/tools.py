@@ -11,7 +11,10 @@ from bs4 import BeautifulSoup
 import json
 import fitz  # PyMuPDF
 import os
+import re
 import ssl
+import threading
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
 
 
 
@@ -48,37 +51,136 @@ ssl_context = ssl.create_default_context()
 ssl_context.check_hostname = False
 ssl_context.verify_mode = ssl.CERT_NONE
 
+TRACKING_PARAMS = {"gclid", "fbclid", "msclkid", "dclid", "igshid", "mc_cid", "mc_eid", "ref_src", "_ga"}
+# Query parameters that mark an AMP rendering only with these values; ?outputType=pdf is a different page
+AMP_PARAM_VALUES = {"amp": {"", "1", "true"}, "outputtype": {"amp"}}
+HOST_VARIANT_PREFIXES = ("www.", "m.", "mobile.", "amp.")
+
+def canonicalize_url(url: str) -> str:
+    """Normalize a URL so tracking parameters and mobile/AMP variants map to the same page."""
+    parts = urlsplit(url.strip())
+    host = (parts.hostname or "").lower()
+    for prefix in HOST_VARIANT_PREFIXES:
+        # Only a variant if a registrable domain is left, so amp.dev and m.com stay as they are
+        if host.startswith(prefix) and host[len(prefix):].count(".") >= 1:
+            host = host[len(prefix):]
+            break
+    if parts.port and parts.port not in (80, 443):
+        host = f"{host}:{parts.port}"
+    path = re.sub(r"/amp(?=/)|\.amp(?=\.html?$)", "", parts.path)
+    # Never let an AMP rewrite collapse a page onto the site root
+    if not path.strip("/"):
+        path = parts.path
+    path = path.rstrip("/") or "/"
+    query = urlencode(sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith("utm_") and k.lower() not in TRACKING_PARAMS
+        and v.lower() not in AMP_PARAM_VALUES.get(k.lower(), ())
+    ))
+    return urlunsplit(("https" if parts.scheme in ("http", "https") else parts.scheme, host, path, query, ""))
+
+
+class UrlFrontier:
+    """Per-run record of pages already downloaded and parsed, keyed by canonical URL.
+
+    start_step() marks where the current research step began (before its prefetch runs), so
+    parsed_before_step() tells pages from earlier steps apart from ones this step just parsed.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pages: dict[str, dict] = {}
+        self._order: dict[str, int] = {}
+        self._step_start = 0
+
+    def __contains__(self, url: str) -> bool:
+        with self._lock:
+            return canonicalize_url(url) in self._pages
+
+    def get(self, url: str) -> dict | None:
+        with self._lock:
+            return self._pages.get(canonicalize_url(url))
+
+    def add(self, page: dict) -> None:
+        if not page.get("url") or not page.get("content"):
+            return
+        key = canonicalize_url(page["url"])
+        with self._lock:
+            self._pages[key] = page
+            self._order.setdefault(key, len(self._order))
+
+    def start_step(self) -> None:
+        with self._lock:
+            self._step_start = len(self._order)
+
+    def parsed_before_step(self, url: str) -> bool:
+        with self._lock:
+            return self._order.get(canonicalize_url(url), self._step_start) < self._step_start
+
+    def reset(self) -> None:
+        with self._lock:
+            self._pages.clear()
+            self._order.clear()
+            self._step_start = 0
+
+
+frontier = UrlFrontier()
+
+def search_urls(input: str, max_results: int, type: Literal["text", "news"]) -> list[str]:
+    """Search only, returning result URLs deduplicated by canonical form."""
+    return asyncio.run(_search_urls(input, max_results=max_results, type=type))
+
+def scrape_urls(urls: list[str]) -> list[dict]:
+    """Download and parse URLs, serving pages already parsed this run from the frontier."""
+    return asyncio.run(_scrape_urls(urls))
+
 async def _search_and_scrape_web(input: str, max_results: int, type: Literal["text", "news"]) -> list[dict]:
+    urls = await _search_urls(input, max_results=max_results, type=type)
+    return await _scrape_urls(urls)
+
+async def _search_urls(input: str, max_results: int, type: Literal["text", "news"]) -> list[str]:
     query = input.strip()
+    with DDGS() as ddgs:
+        max_retries = 5
+        for current_attempt in range(max_retries + 1):
+            try:
+                search_results = ddgs.text(query, max_results=max_results) if type == "text" else ddgs.news(query, max_results=max_results)
+                break
+            except DuckDuckGoSearchException as e:
+                if current_attempt < max_retries:
+                    backoff_time = 2 ** current_attempt
+                    print(f"{str(e)}. Retrying in {backoff_time} seconds...")
+                    await asyncio.sleep(backoff_time)
+                else:
+                    raise e
+
+    urls = []
+    seen = set()
+    for r in search_results:
+        url = r.get("href") or r.get("url")
+        if not url or canonicalize_url(url) in seen:
+            continue
+        seen.add(canonicalize_url(url))
+        urls.append(url)
+    return urls
+
+async def _scrape_urls(urls: list[str]) -> list[dict]:
     results = []
     tasks = []
-
     async with aiohttp.ClientSession() as session:
-        with DDGS() as ddgs:
-            max_retries = 5
-            for current_attempt in range(max_retries + 1):
-                try:
-                    search_results = ddgs.text(query, max_results=max_results) if type == "text" else ddgs.news(query, max_results=max_results)
-                    for r in search_results:
-                        url = r.get("href") or r.get("url")
-                        if not url:
-                            continue
-                        tasks.append(download_and_parse_article(session, url))
-                    completed = await asyncio.gather(*tasks, return_exceptions=True)
-                    for res in completed:
-                        if isinstance(res, Exception):
-                            results.append({"url": "", "content": "", "error": str(res)})
-                        elif res:
-                            results.append(res)
-                    break
-                except DuckDuckGoSearchException as e:
-                    if current_attempt < max_retries:
-                        backoff_time = 2 ** current_attempt
-                        print(f"{str(e)}. Retrying in {backoff_time} seconds...")
-                        await asyncio.sleep(backoff_time)
-                    else:
-                        raise e
-
+        for url in urls:
+            page = frontier.get(url)
+            if page is not None:
+                results.append(page)
+                continue
+            tasks.append(download_and_parse_article(session, url))
+        completed = await asyncio.gather(*tasks, return_exceptions=True)
+    for res in completed:
+        if isinstance(res, Exception):
+            results.append({"url": "", "content": "", "error": str(res)})
+        elif res:
+            frontier.add(res)
+            results.append(res)
     return results
 
 async def fetch(session: aiohttp.ClientSession, url: str) -> bytes | str:
@@ -0,0 +1,154 @@
+# Benchmark: logging overhead (utils.logutil.setup_logger modes) on one full researcher_executor step.
+#
+# The real code path runs: search result handling, aiohttp downloads, HTML parsing, chunking,
+# score_segments and the widening loop, and the summary prompt. Only the external services are
+# replaced, explicitly, before the agents module is imported:
+#   - DuckDuckGo returns URLs on a local HTTP server serving fixture pages
+#   - the cross-encoder is a keyword-overlap scorer (no model download)
+#   - boto3 gets an offline session with dummy credentials (no AWS profile needed)
+#   - the summarizer LLM is a stub that emits the botocore DEBUG chatter of a Bedrock call
+#
+# Usage: python logging_benchmark.py
+
+import contextlib
+import io
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import boto3
+
+from utils import reranker
+from utils.logutil import DEFAULT_LOGGER_LEVELS, setup_logger, stop_listener
+
+RUNS, PAGES, BEDROCK_DEBUG_LINES = 5, 20, 300
+PARAGRAPH = ("<p>Alphabet reported 2024 revenue growth across Search, YouTube and Google Cloud, "
+             "and plans to expand Gemini to win market share in enterprise AI.</p>")
+
+
+class KeywordOverlapScorer:
+    """Stands in for the cross-encoder: share of query words found in the chunk."""
+
+    def score(self, pairs):
+        scores = []
+        for query, doc in pairs:
+            query_words = set(query.lower().split())
+            scores.append(len(query_words & set(doc.lower().split())) / len(query_words))
+        return scores
+
+
+class FixturePages(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = f"<html><body><nav>menu</nav><h1>{self.path}</h1>{PARAGRAPH * 40}</body></html>".encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def fixture_llm(node, prompt, validate=None):
+    log = logging.getLogger("botocore.endpoint")
+    for i in range(BEDROCK_DEBUG_LINES):
+        log.debug("Event before-send.bedrock-runtime.InvokeModel: calling handler %d, body=%r", i, prompt[:200])
+    return "Alphabet grew revenue in 2024 and is pushing Gemini for market share."
+
+
+def offline_session(_session=boto3.Session, **kwargs):
+    return _session(region_name="us-east-1", aws_access_key_id="benchmark", aws_secret_access_key="benchmark")
+
+
+def reset_logging():
+    root_logger = logging.getLogger()
+    for h in list(root_logger.handlers):
+        root_logger.removeHandler(h)
+        h.close()
+
+
+def main():
+    # Stubs go in before utils.common is imported, since it loads the model and AWS session at import
+    reranker.load_cross_encoder = lambda model_name=None: KeywordOverlapScorer()
+    boto3.Session = offline_session
+    from utils import common
+    from components import agents, tools
+
+    common.rerank_model, common.rerank_worker = KeywordOverlapScorer(), None
+    agents.invoke_for_node = fixture_llm
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FixturePages)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    class FixtureDDGS:
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def text(self, query, max_results):
+            return [{"href": f"{base_url}/article/{i}"} for i in range(min(max_results, PAGES))]
+
+        news = text
+
+    tools.DDGS = FixtureDDGS
+    state = {
+        "query": "Google 2024 performance and market share plans",
+        "scratchpad": "",
+        "next_task": "internet_researcher",
+        "task_input": "Google 2024 revenue growth market share plans",
+        "current_step": 1,
+    }
+
+    def run_step() -> float:
+        tools.frontier.reset()
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            agents.researcher_executor(state)
+        return time.perf_counter() - start
+
+    tmp_dir = tempfile.mkdtemp()
+    modes = {
+        "no logging": None,
+        "sync text": dict(async_mode=False, json_format=False),
+        "async text": dict(async_mode=True, json_format=False),
+        "async json": dict(async_mode=True, json_format=True),
+        "async json, botocore/aiohttp sampled at 10%": dict(
+            async_mode=True, json_format=True, sample_rates={"botocore": 0.1, "aiohttp": 0.1}
+        ),
+    }
+    try:
+        run_step()  # warm up imports, parsers and the connection path
+        print(f"researcher_executor, {PAGES} fixture pages, {BEDROCK_DEBUG_LINES} Bedrock DEBUG lines per LLM call")
+        for name, options in modes.items():
+            reset_logging()
+            listener = None
+            if options is None:
+                logging.getLogger().setLevel(logging.CRITICAL)
+                for logger_name in DEFAULT_LOGGER_LEVELS:
+                    logging.getLogger(logger_name).setLevel(logging.CRITICAL)
+            else:
+                listener = setup_logger(
+                    log_file=os.path.join(tmp_dir, name.replace(" ", "_").replace(",", "").replace("/", "_") + ".log"),
+                    logger_levels={}, **{"sample_rates": {}, **options},
+                )
+            timings = sorted(run_step() for _ in range(RUNS))
+            drain_start = time.perf_counter()
+            stop_listener(listener)
+            drain = time.perf_counter() - drain_start
+            print(f"{name:45s} step {timings[RUNS // 2] * 1000:8.1f} ms (median of {RUNS}), background drain {drain * 1000:7.1f} ms")
+    finally:
+        reset_logging()
+        server.shutdown()
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
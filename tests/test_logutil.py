@@ -0,0 +1,52 @@
+import json
+import logging
+
+import pytest
+
+from utils.logutil import setup_logger, stop_listener
+
+
+@pytest.fixture
+def root_logger():
+    root = logging.getLogger()
+    handlers, level = list(root.handlers), root.level
+    yield root
+    for h in list(root.handlers):
+        if h not in handlers:
+            root.removeHandler(h)
+            h.close()
+    root.setLevel(level)
+
+
+def test_async_json_keeps_traceback_out_of_message(tmp_path, root_logger):
+    log_file = tmp_path / "log.jsonl"
+    listener = setup_logger(log_file=str(log_file), async_mode=True, json_format=True, logger_levels={}, sample_rates={})
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        logging.getLogger("test.exc").exception("failed with %s", "args")
+    stop_listener(listener)
+
+    entry = json.loads(log_file.read_text().splitlines()[-1])
+    assert entry["message"] == "failed with args"
+    assert "ValueError: boom" in entry["exc_info"]
+
+
+def test_stop_listener_is_safe_twice(tmp_path, root_logger):
+    listener = setup_logger(log_file=str(tmp_path / "log.txt"), async_mode=True, logger_levels={}, sample_rates={})
+    stop_listener(listener)
+    stop_listener(listener)
+    stop_listener(None)
+
+
+def test_malformed_env_entries_are_skipped(tmp_path, root_logger, monkeypatch, capsys):
+    monkeypatch.setenv("LOG_SAMPLE", "httpcore=abc,aiohttp=0.5,broken,urllib3=2")
+    monkeypatch.setenv("LOG_LEVELS", "langchain=LOUD,httpx=info")
+    listener = setup_logger(log_file=str(tmp_path / "log.txt"), async_mode=True)
+    stop_listener(listener)
+
+    assert logging.getLogger("httpx").level == logging.INFO
+    assert logging.getLogger("langchain").level == logging.DEBUG
+    out = capsys.readouterr().out
+    for bad in ("httpcore", "broken", "urllib3", "LOUD"):
+        assert bad in out
@@ -0,0 +1,90 @@
+import time
+
+import pytest
+
+from components import prefetch
+from components.prefetch import Prefetcher, predict_research_inputs
+
+QUERY = "Find Google's 2024 year performance, how is company doing and what are there immediate plan to get more market share."
+
+
+@pytest.fixture
+def fake_search(monkeypatch):
+    calls = []
+
+    async def _search(input, max_results, type):
+        calls.append(input)
+        return [f"https://example.com/{len(calls)}/{i}" for i in range(max_results)]
+
+    async def _scrape(urls):
+        return [{"url": url, "content": "page"} for url in urls]
+
+    monkeypatch.setattr(prefetch, "_search_urls", _search)
+    monkeypatch.setattr(prefetch, "_scrape_urls", _scrape)
+    return calls
+
+
+def test_step_one_predicts_raw_query():
+    assert predict_research_inputs({"query": QUERY}) == [QUERY]
+
+
+def test_planner_repeating_raw_query_hits_prefetch(fake_search):
+    prefetcher = Prefetcher(enabled=True)
+    prefetcher.prefetch("internet_researcher", QUERY, 20)
+
+    # Planners often echo the question with different quoting, case or spacing
+    planner_input = f'"{QUERY.upper()}  "'
+    prefetcher.cancel_except("internet_researcher", planner_input)
+    result = prefetcher.take("internet_researcher", planner_input, 20)
+
+    assert result == [f"https://example.com/1/{i}" for i in range(20)]
+    assert prefetcher.stats["hits"] == 1
+    assert prefetcher.stats["cancelled"] + prefetcher.stats["wasted"] == 0
+
+
+@pytest.mark.parametrize("planner_input", [
+    "Google 2024 annual financial performance",
+    "Microsoft Azure market share 2024",
+    "Google Pixel 9 market share 2024",
+])
+def test_similar_planner_input_does_not_reuse_other_search(fake_search, planner_input):
+    prefetcher = Prefetcher(enabled=True)
+    prefetcher.prefetch("internet_researcher", QUERY, 20)
+
+    prefetcher.cancel_except("internet_researcher", planner_input)
+    time.sleep(0.05)
+
+    # A different query's results must never stand in for the planner's own search
+    assert prefetcher.take("internet_researcher", planner_input, 20) is None
+    assert prefetcher.stats["hits"] == 0
+    assert prefetcher.stats["cancelled"] + prefetcher.stats["wasted"] == 1
+
+
+def test_summary_prediction_hits_only_on_exact_input(fake_search):
+    state = {
+        "query": QUERY,
+        "current_step": 2,
+        "last_summary": "Alphabet reported revenue of $350B in 2024. "
+                        "Google plans to expand Gemini across search and cloud to win market share from Microsoft.",
+    }
+    prefetcher = Prefetcher(enabled=True)
+    (predicted,) = predict_research_inputs(state)
+    prefetcher.prefetch("internet_researcher", predicted, 20)
+
+    assert prefetcher.take("internet_researcher", "Google Gemini market share plans 2025", 20) is None
+    prefetcher.prefetch("internet_researcher", predicted, 20)
+    assert prefetcher.take("internet_researcher", predicted, 20) is not None
+    assert prefetcher.stats["hits"] == 1
+    assert prefetcher.stats["misses"] == 1
+
+
+def test_unrelated_planner_input_misses_and_cancels(fake_search):
+    prefetcher = Prefetcher(enabled=True)
+    prefetcher.prefetch("internet_researcher", QUERY, 20)
+
+    prefetcher.cancel_except("internet_researcher", "Apple iPhone launch event features")
+    time.sleep(0.05)
+
+    assert prefetcher.take("internet_researcher", "Apple iPhone launch event features", 20) is None
+    assert prefetcher.stats["cancelled"] + prefetcher.stats["wasted"] == 1
+    assert prefetcher.stats["misses"] == 1
@@ -0,0 +1,125 @@
+import queue
+import threading
+
+import pytest
+
+from utils.reranker import RerankWorker, _batch_loop
+
+
+def _run_loop(requests, score_pairs, max_batch_pairs=8, max_wait=0.05):
+    """Queue the requests, run _batch_loop to completion and collect what it delivers."""
+    q = queue.SimpleQueue()
+    for item in requests:
+        q.put(item)
+    q.put(None)
+    delivered = {}
+    _batch_loop(q, score_pairs, lambda key, scores, error: delivered.__setitem__(key, (scores, error)), max_batch_pairs, max_wait)
+    return delivered
+
+
+def test_batches_split_at_max_batch_pairs():
+    batch_sizes = []
+
+    def score_pairs(pairs):
+        batch_sizes.append(len(pairs))
+        return [0.0] * len(pairs)
+
+    _run_loop([(i, "q", ["d"] * 3) for i in range(5)], score_pairs, max_batch_pairs=8)
+
+    # 3 + 3 fit, a third request would overshoot 8 and starts the next batch
+    assert batch_sizes == [6, 6, 3]
+
+
+def test_oversized_request_is_scored_alone():
+    batch_sizes = []
+
+    def score_pairs(pairs):
+        batch_sizes.append(len(pairs))
+        return [0.0] * len(pairs)
+
+    _run_loop([(0, "q", ["d"] * 20), (1, "q", ["d"])], score_pairs, max_batch_pairs=8)
+
+    assert batch_sizes == [20, 1]
+
+
+def test_scores_routed_back_to_each_caller():
+    requests = [(key, f"q{key}", [f"doc{key}-{j}" for j in range(key + 1)]) for key in range(4)]
+
+    delivered = _run_loop(requests, lambda pairs: [len(q) * 100 + len(d) for q, d in pairs], max_batch_pairs=100)
+
+    for key, query, docs in requests:
+        scores, error = delivered[key]
+        assert error is None
+        assert scores == [float(len(query) * 100 + len(d)) for d in docs]
+
+
+def test_scoring_error_reaches_every_future_in_batch():
+    def score_pairs(pairs):
+        raise RuntimeError("model exploded")
+
+    delivered = _run_loop([(i, "q", ["d"]) for i in range(3)], score_pairs)
+
+    assert set(delivered) == {0, 1, 2}
+    for scores, error in delivered.values():
+        assert scores is None
+        assert str(error) == "model exploded"
+
+
+class _StandInModel:
+    def __init__(self):
+        self.batches = []
+        self.lock = threading.Lock()
+
+    def score(self, pairs):
+        with self.lock:
+            self.batches.append(len(pairs))
+        return [float(len(d)) for _, d in pairs]
+
+
+def test_thread_worker_batches_concurrent_callers():
+    model = _StandInModel()
+    worker = RerankWorker(mode="thread", model=model, max_batch_pairs=64, max_wait_ms=50)
+    futures = [worker.submit(f"q{i}", ["x" * j for j in range(1, 5)]) for i in range(8)]
+
+    assert [f.result(timeout=5) for f in futures] == [[1.0, 2.0, 3.0, 4.0]] * 8
+    assert len(model.batches) < 8
+    worker.close()
+
+
+def test_timed_out_request_is_forgotten():
+    release = threading.Event()
+
+    class SlowModel:
+        def score(self, pairs):
+            release.wait(5)
+            return [0.0] * len(pairs)
+
+    worker = RerankWorker(mode="thread", model=SlowModel(), timeout=0.05)
+    with pytest.raises(TimeoutError):
+        worker.score("q", ["d"])
+
+    assert worker._futures == {}
+    release.set()
+    assert worker.submit("q", ["d"]).result(timeout=5) == [0.0]
+    worker.close()
+
+
+def test_process_worker_fails_pending_requests_when_model_load_fails(tmp_path):
+    worker = RerankWorker(mode="process", model_name=str(tmp_path / "no-such-model"), timeout=120)
+
+    with pytest.raises(RuntimeError, match="reranker worker"):
+        worker.score("q", ["d"])
+    # Later requests fail straight away instead of queueing for a dead worker
+    with pytest.raises(RuntimeError, match="reranker worker"):
+        worker.submit("q", ["d"]).result(timeout=1)
+    worker.close()
+
+
+def test_process_worker_fails_pending_requests_when_child_dies(tmp_path):
+    worker = RerankWorker(mode="process", model_name=str(tmp_path / "no-such-model"), timeout=120)
+    future = worker.submit("q", ["d"])
+    worker._process.kill()
+
+    with pytest.raises(RuntimeError, match="reranker worker"):
+        future.result(timeout=30)
+    worker.close()
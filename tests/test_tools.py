@@ -0,0 +1,74 @@
+import pytest
+
+from components.tools import UrlFrontier, canonicalize_url
+
+
+@pytest.mark.parametrize("variant, canonical", [
+    ("https://www.example.com/news/story/?utm_source=x&id=3&fbclid=1#top", "https://example.com/news/story?id=3"),
+    ("http://m.example.com/news/story?id=3", "https://example.com/news/story?id=3"),
+    ("https://amp.cnn.com/2024/a.amp.html", "https://cnn.com/2024/a.html"),
+    ("https://example.com/amp/post", "https://example.com/post"),
+    ("https://example.com/post/amp/", "https://example.com/post"),
+    ("https://example.com/post?outputType=amp", "https://example.com/post"),
+    ("https://example.com/post?amp", "https://example.com/post"),
+    ("https://example.com/post?amp=1&id=3", "https://example.com/post?id=3"),
+])
+def test_variants_collapse(variant, canonical):
+    assert canonicalize_url(variant) == canonical
+
+
+@pytest.mark.parametrize("url, canonical", [
+    ("https://amp.dev/x", "https://amp.dev/x"),
+    ("https://m.com/", "https://m.com/"),
+    ("https://www.m.com/page", "https://m.com/page"),
+    ("https://example.com/amp", "https://example.com/amp"),
+    ("https://example.com/amp/", "https://example.com/amp"),
+    ("https://example.com/post/amp", "https://example.com/post/amp"),
+])
+def test_short_hosts_and_bare_amp_paths_are_kept(url, canonical):
+    assert canonicalize_url(url) == canonical
+
+
+@pytest.mark.parametrize("url, canonical", [
+    ("https://github.com/x/y?ref=main", "https://github.com/x/y?ref=main"),
+    ("https://github.com/x/y/blob/README.md?ref=v2.0", "https://github.com/x/y/blob/README.md?ref=v2.0"),
+    ("https://example.com/report?outputType=pdf", "https://example.com/report?outputType=pdf"),
+    ("https://example.com/post?amp=0", "https://example.com/post?amp=0"),
+])
+def test_params_that_select_content_are_kept(url, canonical):
+    assert canonicalize_url(url) == canonical
+    assert canonicalize_url(url) != canonicalize_url(url.split("?")[0])
+
+
+def test_amp_path_never_maps_to_homepage():
+    assert canonicalize_url("https://example.com/amp") != canonicalize_url("https://example.com/")
+    assert canonicalize_url("https://example.com/amp/") != canonicalize_url("https://example.com")
+
+
+def test_frontier_serves_variants_of_parsed_page():
+    frontier = UrlFrontier()
+    page = {"url": "https://www.example.com/story?utm_medium=social", "content": "parsed"}
+    frontier.add(page)
+
+    assert "https://m.example.com/story" in frontier
+    assert frontier.get("https://example.com/story/") is page
+    assert frontier.get("https://example.com/") is None
+
+    frontier.add({"url": "https://example.com/empty", "content": ""})
+    assert "https://example.com/empty" not in frontier
+
+
+def test_frontier_tells_earlier_steps_from_current_step():
+    frontier = UrlFrontier()
+    frontier.add({"url": "https://example.com/earlier", "content": "parsed"})
+    frontier.start_step()
+    frontier.add({"url": "https://example.com/prefetched", "content": "parsed"})
+    # Re-adding a page parsed by an earlier step keeps it counted as earlier
+    frontier.add({"url": "https://www.example.com/earlier", "content": "parsed again"})
+
+    assert frontier.parsed_before_step("https://example.com/earlier")
+    assert not frontier.parsed_before_step("https://example.com/prefetched")
+    assert not frontier.parsed_before_step("https://example.com/unseen")
+
+    frontier.reset()
+    assert not frontier.parsed_before_step("https://example.com/earlier")
@@ -1,27 +1,39 @@
 # Multi-Agent ReAct System with Planner and Routed Executors using ToolNode
 
 from langchain_aws import ChatBedrock
-from typing import TypedDict, List, Union
+from typing import TypedDict, List, Tuple, Union
 from langchain.callbacks.base import BaseCallbackHandler
 import boto3
-from langchain.retrievers.document_compressors.cross_encoder_rerank import CrossEncoderReranker
-from langchain_community.cross_encoders import HuggingFaceCrossEncoder
-from langchain.schema import Document
+import os
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-
-
-rerank_model = HuggingFaceCrossEncoder(model_name="BAAI/bge-reranker-base")
+from utils.reranker import RERANK_MODEL_NAME, RerankWorker, load_cross_encoder
+
+
+# RERANK_WORKER=thread|process routes scoring through a shared micro-batching worker
+RERANK_WORKER_MODE = os.getenv("RERANK_WORKER", "off").strip().lower()
+
+rerank_worker = None
+if RERANK_WORKER_MODE == "process":
+    # The child process owns the model, so don't load a second copy here
+    rerank_model = None
+    rerank_worker = RerankWorker(mode="process", model_name=RERANK_MODEL_NAME)
+else:
+    rerank_model = load_cross_encoder(RERANK_MODEL_NAME)
+    if RERANK_WORKER_MODE == "thread":
+        rerank_worker = RerankWorker(mode="thread", model=rerank_model)
+
+def score_segments(documents: List[str], query: str) -> List[Tuple[str, float]]:
+    """Score each segment against the query with the cross-encoder, best first."""
+    if not documents:
+        return []
+    if rerank_worker is not None:
+        scores = rerank_worker.score(query, documents)
+    else:
+        scores = rerank_model.score([(query, doc) for doc in documents])
+    return sorted(zip(documents, map(float, scores)), key=lambda x: x[1], reverse=True)
 
 def rerank_segments(documents: List[str],query: str) -> List[str]:
-    compressor = CrossEncoderReranker(model=rerank_model, top_n=len(documents))
-    # compression_retriever = ContextualCompressionRetriever(
-    #     base_compressor=compressor, base_retriever=
-    # )
-    doc_objs = [Document(page_content=doc) for doc in documents]
-    result = compressor.compress_documents(documents=doc_objs, query=query)
-    return [doc.page_content for doc in result]
-
-    # compressed_docs = compression_retriever.invoke("What is the plan for the economy?")
+    return [doc for doc, _ in score_segments(documents, query)]
 
 def chunk_documents(doc_texts: List[str], chunk_size: int = 500, overlap: int = 50) -> List[str]:
     splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=overlap)
@@ -50,6 +62,8 @@ class AgentState(TypedDict):
     task_input: str
     result: str
     current_step: int
+    last_summary: str
+    artifacts: List[dict]
 
 session = boto3.Session(
     profile_name='adfs'
@@ -1,35 +1,183 @@
+import atexit
+import copy
+import json
 import logging
-from logging.handlers import RotatingFileHandler
+import os
+import queue
+import random
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+# Used when LOG_LEVELS does not override them
+DEFAULT_LOGGER_LEVELS = {
+    "langchain": logging.DEBUG,
+    "httpx": logging.DEBUG,
+    "httpcore": logging.DEBUG,
+    "aiohttp": logging.DEBUG,
+    # Suppress overly verbose logs
+    "urllib3": logging.WARNING,
+    "asyncio": logging.WARNING,
+}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record),
+            "logger": record.name,
+            "level": record.levelname,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc_info"] = record.exc_text
+        if record.stack_info:
+            entry["stack_info"] = self.formatStack(record.stack_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class DeferredQueueHandler(QueueHandler):
+    """QueueHandler that leaves formatting to the listener's handler.
+
+    The stock prepare() formats on the calling thread and drops exc_info, so structured
+    output would lose the traceback. Here only the message arguments are merged, which
+    keeps later mutation of the args from changing what gets written.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+class SamplingFilter(logging.Filter):
+    """Keep only a fraction of records below WARNING for the configured logger prefixes."""
+
+    def __init__(self, rates: dict[str, float]):
+        super().__init__()
+        # Longest prefix first so "httpcore.http11" wins over "httpcore"
+        self.rates = sorted(rates.items(), key=lambda x: len(x[0]), reverse=True)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        for name, rate in self.rates:
+            if record.name == name or record.name.startswith(name + "."):
+                return rate >= 1 or random.random() < rate
+        return True
+
+
+def _parse_mapping(env_var: str) -> dict[str, str]:
+    """Parse "a=1,b=2" from an env var into {"a": "1", "b": "2"}, skipping malformed entries."""
+    mapping = {}
+    for item in filter(None, (item.strip() for item in os.getenv(env_var, "").split(","))):
+        name, sep, value = (part.strip() for part in item.partition("="))
+        if not sep or not name or not value:
+            print(f"⚠️ Ignoring malformed {env_var} entry: {item!r}")
+            continue
+        mapping[name] = value
+    return mapping
+
+
+def _levels_from_env() -> dict[str, int]:
+    known = logging.getLevelNamesMapping()
+    levels = {}
+    for name, value in _parse_mapping("LOG_LEVELS").items():
+        if value.upper() not in known:
+            print(f"⚠️ Ignoring unknown LOG_LEVELS level for {name}: {value!r}")
+            continue
+        levels[name] = known[value.upper()]
+    return levels
+
+
+def _sample_rates_from_env() -> dict[str, float]:
+    rates = {}
+    for name, value in _parse_mapping("LOG_SAMPLE").items():
+        try:
+            rate = float(value)
+        except ValueError:
+            rate = -1.0
+        if not 0.0 <= rate <= 1.0:
+            print(f"⚠️ Ignoring LOG_SAMPLE rate for {name}, expected 0..1: {value!r}")
+            continue
+        rates[name] = rate
+    return rates
+
+
+def stop_listener(listener: QueueListener | None) -> None:
+    """Flush and stop the background writer; safe to call more than once."""
+    if listener is not None and listener._thread is not None:
+        listener.stop()
+
 
 def setup_logger(
     log_file: str = "tmp/llm_debug.log",
-    max_bytes: int = 1 * 1024 * 1024, 
+    max_bytes: int = 1 * 1024 * 1024,
     backup_count: int = 5,
-    level: int = logging.DEBUG
-):
+    level: int = logging.DEBUG,
+    async_mode: bool | None = None,
+    json_format: bool | None = None,
+    logger_levels: dict[str, int | str] | None = None,
+    sample_rates: dict[str, float] | None = None,
+) -> QueueListener | None:
     """
     Set up a rotating logger for LangChain and LLM HTTP calls.
+
+    Unset options come from the environment:
+      LOG_ASYNC   - "0" writes synchronously; default hands records to a background writer thread
+      LOG_FORMAT  - "json" for structured output, default is plain text
+      LOG_LEVELS  - per-logger levels, e.g. "httpcore=INFO,langchain=DEBUG"
+      LOG_SAMPLE  - per-logger keep rates below WARNING, e.g. "httpcore=0.1,aiohttp=0.25"
+    Malformed env entries are skipped with a warning.
+    Returns the QueueListener in async mode so callers can flush it early with stop_listener();
+    it is also stopped at exit.
     """
-    formatter = logging.Formatter(
-        "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-    )
+    if async_mode is None:
+        async_mode = os.getenv("LOG_ASYNC", "1").strip().lower() not in ("0", "false", "no", "off")
+    if json_format is None:
+        json_format = os.getenv("LOG_FORMAT", "text").strip().lower() == "json"
+    if logger_levels is None:
+        logger_levels = _levels_from_env()
+    if sample_rates is None:
+        sample_rates = _sample_rates_from_env()
+
+    if json_format:
+        formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter(
+            "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+        )
 
+    os.makedirs(os.path.dirname(log_file) or ".", exist_ok=True)
     handler = RotatingFileHandler(
         log_file, maxBytes=max_bytes, backupCount=backup_count
     )
     handler.setFormatter(formatter)
 
+    listener = None
+    if async_mode:
+        # The calling thread only enqueues; file I/O and rotation happen on the listener thread
+        log_queue = queue.SimpleQueue()
+        listener = QueueListener(log_queue, handler, respect_handler_level=True)
+        listener.start()
+        atexit.register(stop_listener, listener)
+        handler = DeferredQueueHandler(log_queue)
+    if sample_rates:
+        # Filter before enqueueing so dropped records cost nothing downstream
+        handler.addFilter(SamplingFilter(sample_rates))
+
     # Apply to root logger
     root_logger = logging.getLogger()
     root_logger.setLevel(level)
     root_logger.addHandler(handler)
 
     # LangChain and related libraries
-    logging.getLogger("langchain").setLevel(logging.DEBUG)
-    logging.getLogger("httpx").setLevel(logging.DEBUG)
-    logging.getLogger("httpcore").setLevel(logging.DEBUG)
-    logging.getLogger("aiohttp").setLevel(logging.DEBUG)
+    for name, logger_level in {**DEFAULT_LOGGER_LEVELS, **logger_levels}.items():
+        logging.getLogger(name).setLevel(logger_level)
+
+    return listener
 
-    # Suppress overly verbose logs
-    logging.getLogger("urllib3").setLevel(logging.WARNING)
-    logging.getLogger("asyncio").setLevel(logging.WARNING)
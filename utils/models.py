@@ -0,0 +1,78 @@
+# Per-node model routing: each graph node gets its own Bedrock model, with optional fallback to the large model
+
+import os
+import time
+from collections import defaultdict
+from typing import Callable, Dict, Tuple
+
+from langchain_aws import ChatBedrock
+
+from utils.common import MODEL_ID, SimpleLogger, bedrock_runtime_client, llm
+
+SMALL_MODEL_ID = 'meta.llama3-8b-instruct-v1:0'
+
+# Override any node with <NODE>_MODEL_ID, e.g. SUMMARIZER_MODEL_ID=meta.llama3-70b-instruct-v1:0
+MODEL_REGISTRY: Dict[str, str] = {
+    "planner": os.getenv("PLANNER_MODEL_ID", MODEL_ID),
+    "summarizer": os.getenv("SUMMARIZER_MODEL_ID", SMALL_MODEL_ID),
+    "answer": os.getenv("ANSWER_MODEL_ID", MODEL_ID),
+}
+
+# Retry on FALLBACK_MODEL_ID when a smaller model's output is empty or fails validation
+CASCADE_FALLBACK = os.getenv("MODEL_CASCADE", "1").strip().lower() not in ("0", "false", "no", "off")
+FALLBACK_MODEL_ID = os.getenv("FALLBACK_MODEL_ID", MODEL_ID)
+
+_llms: Dict[str, ChatBedrock] = {MODEL_ID: llm}
+
+# Keyed by (node, model_id) so fallback calls on the large model are reported on their own line
+node_usage: Dict[Tuple[str, str], Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+
+
+def get_llm(model_id: str) -> ChatBedrock:
+    if model_id not in _llms:
+        _llms[model_id] = ChatBedrock(
+            client=bedrock_runtime_client,
+            model=model_id,
+            temperature=0,
+            callbacks=[SimpleLogger()],
+            verbose=True
+        )
+    return _llms[model_id]
+
+
+def _timed_invoke(node: str, model_id: str, prompt: str) -> str:
+    start = time.perf_counter()
+    response = get_llm(model_id).invoke(prompt)
+    usage = getattr(response, "usage_metadata", None) or {}
+    stats = node_usage[(node, model_id)]
+    stats["calls"] += 1
+    stats["latency_s"] += time.perf_counter() - start
+    stats["input_tokens"] += usage.get("input_tokens", 0)
+    stats["output_tokens"] += usage.get("output_tokens", 0)
+    return response.content
+
+
+def invoke_for_node(node: str, prompt: str, validate: Callable[[str], bool] | None = None) -> str:
+    """Run the prompt on the node's model, cascading to the fallback model on empty or invalid output."""
+    model_id = MODEL_REGISTRY[node]
+    text = _timed_invoke(node, model_id, prompt)
+    valid = bool(text.strip()) and (validate is None or validate(text))
+    if not valid and CASCADE_FALLBACK and model_id != FALLBACK_MODEL_ID:
+        print(f"⚠️ {node} output from {model_id} was empty or malformed, retrying with {FALLBACK_MODEL_ID}")
+        node_usage[(node, model_id)]["fallbacks"] += 1
+        text = _timed_invoke(node, FALLBACK_MODEL_ID, prompt)
+    return text
+
+
+def usage_report() -> str:
+    lines = ["Per-node LLM usage:"]
+    for (node, model_id), stats in node_usage.items():
+        calls = int(stats["calls"])
+        role = "" if model_id == MODEL_REGISTRY.get(node) else " (fallback)"
+        lines.append(
+            f"  {node:10s} {model_id + role:43s} {calls} calls, "
+            f"{stats['latency_s']:.1f}s total ({stats['latency_s'] / max(calls, 1):.1f}s avg), "
+            f"{int(stats['input_tokens'])} in / {int(stats['output_tokens'])} out tokens, "
+            f"{int(stats['fallbacks'])} fell back"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,260 @@
+# Shared cross-encoder worker: one model, dynamic micro-batches across all in-flight rerank requests
+
+import itertools
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError
+from typing import Callable, List, Literal, Tuple
+
+# A Hugging Face model ID or a local directory holding a cross-encoder
+RERANK_MODEL_NAME = os.getenv("RERANK_MODEL", "BAAI/bge-reranker-base")
+
+
+def load_cross_encoder(model_name: str = RERANK_MODEL_NAME):
+    from langchain_community.cross_encoders import HuggingFaceCrossEncoder
+    return HuggingFaceCrossEncoder(model_name=model_name)
+
+
+def _batch_loop(requests, score_pairs: Callable, deliver: Callable, max_batch_pairs: int, max_wait: float) -> None:
+    """Pull (key, query, documents) requests and score them in batches.
+
+    A batch closes when it holds max_batch_pairs pairs or max_wait seconds after its first
+    request arrived, whichever comes first. None on the queue stops the loop.
+    """
+    pending = None
+    while True:
+        first = pending if pending is not None else requests.get()
+        pending = None
+        if first is None:
+            return
+        batch = [first]
+        n_pairs = len(first[2])
+        deadline = time.monotonic() + max_wait
+        stop = False
+        while n_pairs < max_batch_pairs:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                item = requests.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if item is None:
+                stop = True
+                break
+            if n_pairs + len(item[2]) > max_batch_pairs:
+                # Leave it for the next batch rather than overshoot
+                pending = item
+                break
+            batch.append(item)
+            n_pairs += len(item[2])
+
+        pairs = [(query, doc) for _, query, docs in batch for doc in docs]
+        try:
+            scores = list(map(float, score_pairs(pairs))) if pairs else []
+        except Exception as e:
+            for key, _, _ in batch:
+                deliver(key, None, e)
+        else:
+            offset = 0
+            for key, _, docs in batch:
+                deliver(key, scores[offset:offset + len(docs)], None)
+                offset += len(docs)
+        if stop:
+            return
+
+
+def _process_main(model_name: str, requests, results, max_batch_pairs: int, max_wait: float) -> None:
+    # A None key reports a fatal error: the parent fails every pending request
+    try:
+        model = load_cross_encoder(model_name)
+        _batch_loop(
+            requests,
+            model.score,
+            lambda key, scores, error: results.put((key, scores, repr(error) if error else None)),
+            max_batch_pairs,
+            max_wait,
+        )
+    except BaseException as e:
+        results.put((None, None, f"reranker worker failed: {e!r}"))
+        raise
+    results.put(None)
+
+
+class RerankWorker:
+    """Single owner of the cross-encoder, fed through a queue by every caller.
+
+    mode="thread" scores on a background thread of this process (pass an already loaded
+    model to share it); mode="process" loads its own model in a child process so scoring
+    does not compete with the caller for the GIL. Results come back as futures.
+
+    If the child process dies, every pending and later request fails instead of hanging,
+    and score() gives up after `timeout` seconds.
+    """
+
+    def __init__(
+        self,
+        mode: Literal["thread", "process"] = "thread",
+        model=None,
+        model_name: str = RERANK_MODEL_NAME,
+        max_batch_pairs: int = 128,
+        max_wait_ms: float = 10,
+        timeout: float | None = 300,
+    ):
+        if mode not in ("thread", "process"):
+            raise ValueError(f"Unknown reranker worker mode: {mode}")
+        self.mode = mode
+        self.model = model
+        self.model_name = model_name
+        self.max_batch_pairs = max_batch_pairs
+        self.max_wait = max_wait_ms / 1000
+        self.timeout = timeout
+        self._error: str | None = None
+        self._lock = threading.Lock()
+        self._ids = itertools.count()
+        self._futures: dict[int, Future] = {}
+        self._requests = None
+        self._threads: List[threading.Thread] = []
+        self._process = None
+
+    def _start(self) -> None:
+        # Started lazily so importing this module never spawns anything
+        if self.mode == "thread":
+            if self.model is None:
+                self.model = load_cross_encoder(self.model_name)
+            self._requests = queue.SimpleQueue()
+            target = lambda: _batch_loop(self._requests, self.model.score, self._deliver, self.max_batch_pairs, self.max_wait)
+            self._threads = [threading.Thread(target=target, name="rerank-worker", daemon=True)]
+        else:
+            ctx = multiprocessing.get_context("spawn")
+            self._requests = ctx.Queue()
+            self._results = ctx.Queue()
+            self._process = ctx.Process(
+                target=_process_main,
+                args=(self.model_name, self._requests, self._results, self.max_batch_pairs, self.max_wait),
+                name="rerank-worker",
+                daemon=True,
+            )
+            self._process.start()
+            self._threads = [threading.Thread(target=self._collect, name="rerank-collector", daemon=True)]
+        for t in self._threads:
+            t.start()
+
+    def _deliver(self, key: int, scores: List[float] | None, error) -> None:
+        with self._lock:
+            future = self._futures.pop(key, None)
+        if future is None:
+            return
+        if error is not None:
+            future.set_exception(error if isinstance(error, BaseException) else RuntimeError(error))
+        else:
+            future.set_result(scores)
+
+    def _fail_all(self, error: str) -> None:
+        with self._lock:
+            self._error = error
+            futures, self._futures = list(self._futures.values()), {}
+        for future in futures:
+            future.set_exception(RuntimeError(error))
+
+    def _collect(self) -> None:
+        while True:
+            try:
+                item = self._results.get(timeout=0.5)
+            except queue.Empty:
+                if not self._process.is_alive():
+                    self._fail_all(f"reranker worker exited with code {self._process.exitcode}")
+                    return
+                continue
+            if item is None:
+                return
+            if item[0] is None:
+                self._fail_all(item[2])
+                return
+            self._deliver(*item)
+
+    def submit(self, query: str, documents: List[str]) -> Future:
+        """Queue (query, document) pairs for scoring; the future resolves to one score per document."""
+        future = Future()
+        if not documents:
+            future.set_result([])
+            return future
+        with self._lock:
+            if self._error is not None:
+                future.set_exception(RuntimeError(self._error))
+                return future
+            if self._requests is None:
+                self._start()
+            key = next(self._ids)
+            self._futures[key] = future
+        self._requests.put((key, query, list(documents)))
+        return future
+
+    def score(self, query: str, documents: List[str]) -> List[float]:
+        future = self.submit(query, documents)
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            # Nobody is waiting any more; a late result for it is dropped by _deliver
+            with self._lock:
+                self._futures = {k: f for k, f in self._futures.items() if f is not future}
+            raise
+
+    def close(self) -> None:
+        with self._lock:
+            if self._requests is None:
+                return
+            self._requests.put(None)
+        for t in self._threads:
+            t.join()
+        if self._process is not None:
+            self._process.join()
+        self._requests = None
+
+
+if __name__ == "__main__":
+    # Load benchmark: concurrent research steps each reranking a step's worth of chunks,
+    # scored directly against one shared model vs through the batching worker.
+    import argparse
+    from concurrent.futures import ThreadPoolExecutor
+
+    parser = argparse.ArgumentParser(description="Reranker throughput under concurrent load")
+    parser.add_argument("--model", default=RERANK_MODEL_NAME, help="Model ID or local cross-encoder directory")
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=4, help="Requests per client")
+    parser.add_argument("--pairs", type=int, default=24, help="Chunks per request")
+    parser.add_argument("--max-batch-pairs", type=int, default=128)
+    parser.add_argument("--max-wait-ms", type=float, default=10)
+    args = parser.parse_args()
+
+    chunk = ("Alphabet reported fourth quarter revenue growth driven by search, YouTube ads and "
+             "Google Cloud, while capital expenditure on AI infrastructure rose sharply. ") * 3
+    workload: List[Tuple[str, List[str]]] = [
+        (f"Google 2024 performance question {i}", [f"{chunk} [{i}:{j}]" for j in range(args.pairs)])
+        for i in range(args.clients * args.requests)
+    ]
+    total_pairs = len(workload) * args.pairs
+
+    def run(score: Callable[[str, List[str]], List[float]]) -> float:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(args.clients) as pool:
+            list(pool.map(lambda item: score(*item), workload))
+        return total_pairs / (time.perf_counter() - start)
+
+    model = load_cross_encoder(args.model)
+    model.score([("warm up", chunk)])
+    import torch
+    print(f"{args.model} on {os.cpu_count()} CPUs ({torch.get_num_threads()} torch threads), "
+          f"{args.clients} clients x {args.requests} requests x {args.pairs} pairs")
+    print(f"{'direct, shared model':25s} {run(lambda q, docs: model.score([(q, d) for d in docs])):8.1f} pairs/s")
+    for mode in ("thread", "process"):
+        worker = RerankWorker(
+            mode=mode, model=model if mode == "thread" else None, model_name=args.model,
+            max_batch_pairs=args.max_batch_pairs, max_wait_ms=args.max_wait_ms,
+        )
+        worker.score("warm up", [chunk])
+        print(f"{mode + ' worker':25s} {run(worker.score):8.1f} pairs/s")
+        worker.close()